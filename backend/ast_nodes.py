@@ -1,81 +1,190 @@
 # File: ast_nodes.py
 # Defines classes for Fluent Abstract Syntax Tree (AST) nodes.
 
+class NodeKind:
+    """
+    Integer tag carried by every node class. Visitors index a list with it
+    instead of looking up methods by class name or chaining isinstance checks.
+    """
+    NODE = 0 # Base Node / Expression, no dedicated visitor
+    PROGRAM = 1
+    VARIABLE_DECLARATION = 2
+    ASSIGNMENT = 3
+    PRINT_STATEMENT = 4
+    FUNCTION_CALL_STATEMENT = 5
+    IF_STATEMENT = 6
+    WHILE_STATEMENT = 7
+    FOREACH_STATEMENT = 8
+    FUNCTION_DEFINITION = 9
+    PARAMETER = 10
+    RETURN_STATEMENT = 11
+    BREAK_STATEMENT = 12
+    TYPE = 13
+    LIST_TYPE = 14
+    MAP_TYPE = 15
+    LITERAL = 16
+    IDENTIFIER = 17
+    BINARY_OP = 18
+    UNARY_OP = 19
+    FUNCTION_CALL = 20
+    LIST_LITERAL = 21
+    MAP_LITERAL = 22
+
 class Node:
     """Base class for all AST nodes."""
-    pass
+    __slots__ = ()
+    kind = NodeKind.NODE
+    _visit_name = 'visit_Node'
+    # Fields holding a child node / a list of child nodes. Everything else
+    # in __slots__ is a scalar (strings, operator names, literal values).
+    _node_fields = ()
+    _list_fields = ()
+    _scalar_fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # Visitor method name, computed once per class rather than per visit
+        cls._visit_name = 'visit_' + cls.__name__
+        # Classify fields once so generic walks need no dir()/isinstance probing
+        children = set(cls._node_fields) | set(cls._list_fields)
+        cls._scalar_fields = tuple(
+            field for klass in reversed(cls.__mro__)
+            for field in klass.__dict__.get('__slots__', ())
+            if field not in children
+        )
 
 # Statements
+class Statement(Node):
+    """Base class for statements, which record the source line they start on."""
+    __slots__ = ('line',)
+
 class Program(Node):
+    __slots__ = ('statements',)
+    kind = NodeKind.PROGRAM
+    _list_fields = ('statements',)
     def __init__(self, statements):
         self.statements = statements # List of statement nodes
 
-class VariableDeclaration(Node):
-    def __init__(self, name, var_type, initializer):
+class VariableDeclaration(Statement):
+    __slots__ = ('name', 'var_type', 'initializer')
+    kind = NodeKind.VARIABLE_DECLARATION
+    _node_fields = ('name', 'var_type', 'initializer')
+    def __init__(self, name, var_type, initializer, line=None):
         self.name = name # IDENTIFIER token
         self.var_type = var_type # Type node
         self.initializer = initializer # Expression node
+        self.line = line # Source line number, or None
 
-class Assignment(Node):
-    def __init__(self, target, value):
+class Assignment(Statement):
+    __slots__ = ('target', 'value')
+    kind = NodeKind.ASSIGNMENT
+    _node_fields = ('target', 'value')
+    def __init__(self, target, value, line=None):
         self.target = target # IDENTIFIER token
         self.value = value # Expression node
+        self.line = line # Source line number, or None
 
-class PrintStatement(Node):
-    def __init__(self, expression):
+class PrintStatement(Statement):
+    __slots__ = ('expression',)
+    kind = NodeKind.PRINT_STATEMENT
+    _node_fields = ('expression',)
+    def __init__(self, expression, line=None):
         self.expression = expression # Expression node
+        self.line = line # Source line number, or None
 
-class FunctionCallStatement(Node):
-    def __init__(self, function_call):
+class FunctionCallStatement(Statement):
+    __slots__ = ('function_call',)
+    kind = NodeKind.FUNCTION_CALL_STATEMENT
+    _node_fields = ('function_call',)
+    def __init__(self, function_call, line=None):
         self.function_call = function_call # FunctionCall node
+        self.line = line # Source line number, or None
 
-class IfStatement(Node):
-    def __init__(self, condition, then_block, else_block):
+class IfStatement(Statement):
+    __slots__ = ('condition', 'then_block', 'else_block')
+    kind = NodeKind.IF_STATEMENT
+    _node_fields = ('condition',)
+    _list_fields = ('then_block', 'else_block')
+    def __init__(self, condition, then_block, else_block, line=None):
         self.condition = condition # Expression node
         self.then_block = then_block # List of statement nodes
         self.else_block = else_block # List of statement nodes or None
+        self.line = line # Source line number, or None
 
-class WhileStatement(Node):
-    def __init__(self, condition, body):
+class WhileStatement(Statement):
+    __slots__ = ('condition', 'body')
+    kind = NodeKind.WHILE_STATEMENT
+    _node_fields = ('condition',)
+    _list_fields = ('body',)
+    def __init__(self, condition, body, line=None):
         self.condition = condition # Expression node
         self.body = body # List of statement nodes
+        self.line = line # Source line number, or None
 
-class ForeachStatement(Node):
-    def __init__(self, item, collection, body):
+class ForeachStatement(Statement):
+    __slots__ = ('item', 'collection', 'body')
+    kind = NodeKind.FOREACH_STATEMENT
+    _node_fields = ('item', 'collection')
+    _list_fields = ('body',)
+    def __init__(self, item, collection, body, line=None):
         self.item = item # IDENTIFIER token for the iterator variable
         self.collection = collection # Expression node to iterate over
         self.body = body # List of statement nodes
+        self.line = line # Source line number, or None
 
-class FunctionDefinition(Node):
-    def __init__(self, name, params, return_type, body):
+class FunctionDefinition(Statement):
+    __slots__ = ('name', 'params', 'return_type', 'body')
+    kind = NodeKind.FUNCTION_DEFINITION
+    _node_fields = ('name', 'return_type')
+    _list_fields = ('params', 'body')
+    def __init__(self, name, params, return_type, body, line=None):
         self.name = name # IDENTIFIER token
         self.params = params # List of Parameter nodes
         self.return_type = return_type # Type node
         self.body = body # List of statement nodes
+        self.line = line # Source line number, or None
 
 class Parameter(Node):
+    __slots__ = ('name', 'param_type')
+    kind = NodeKind.PARAMETER
+    _node_fields = ('name', 'param_type')
     def __init__(self, name, param_type):
         self.name = name # IDENTIFIER token
         self.param_type = param_type # Type node
 
-class ReturnStatement(Node):
-    def __init__(self, expression):
+class ReturnStatement(Statement):
+    __slots__ = ('expression',)
+    kind = NodeKind.RETURN_STATEMENT
+    _node_fields = ('expression',)
+    def __init__(self, expression, line=None):
         self.expression = expression # Expression node or None
+        self.line = line # Source line number, or None
 
-class BreakStatement(Node):
-    pass # No data needed
+class BreakStatement(Statement):
+    __slots__ = () # Only the line from Statement
+    kind = NodeKind.BREAK_STATEMENT
+    def __init__(self, line=None):
+        self.line = line # Source line number, or None
 
 # Types
 class Type(Node):
+    __slots__ = ('name',)
+    kind = NodeKind.TYPE
     def __init__(self, name):
         self.name = name # String like "INTEGER", "STRING"
 
 class ListType(Type):
+    __slots__ = ('element_type',)
+    kind = NodeKind.LIST_TYPE
+    _node_fields = ('element_type',)
     def __init__(self, element_type):
         super().__init__("LIST")
         self.element_type = element_type # Another Type node
 
 class MapType(Type):
+    __slots__ = ('key_type', 'value_type')
+    kind = NodeKind.MAP_TYPE
+    _node_fields = ('key_type', 'value_type')
     def __init__(self, key_type, value_type):
         super().__init__("MAP")
         self.key_type = key_type # Type node
@@ -83,49 +192,90 @@ class MapType(Type):
 
 # Expressions
 class Expression(Node):
-    pass
+    __slots__ = ()
 
 class Literal(Node):
+    __slots__ = ('value', 'type')
+    kind = NodeKind.LITERAL
     def __init__(self, value, literal_type):
         self.value = value # The actual value (int, float, str, bool, None)
         self.type = literal_type # String like "INTEGER", "STRING", etc.
 
 class Identifier(Node):
-    def __init__(self, name):
+    __slots__ = ('name', 'line')
+    kind = NodeKind.IDENTIFIER
+    def __init__(self, name, line=None):
         self.name = name # String (variable name)
+        self.line = line # Source line number, or None
 
 class BinaryOp(Node):
+    __slots__ = ('left', 'operator', 'right')
+    kind = NodeKind.BINARY_OP
+    _node_fields = ('left', 'right')
     def __init__(self, left, operator, right):
         self.left = left # Expression node
         self.operator = operator # Operator string like "+", "==", "AND"
         self.right = right # Expression node
 
 class UnaryOp(Node):
+    __slots__ = ('operator', 'operand')
+    kind = NodeKind.UNARY_OP
+    _node_fields = ('operand',)
     def __init__(self, operator, operand):
         self.operator = operator # Operator string like "-", "NOT"
         self.operand = operand # Expression node
 
 class FunctionCall(Node):
-    def __init__(self, name, arguments):
+    __slots__ = ('name', 'arguments', 'line')
+    kind = NodeKind.FUNCTION_CALL
+    _list_fields = ('arguments',)
+    def __init__(self, name, arguments, line=None):
         self.name = name # IDENTIFIER token
         self.arguments = arguments # List of expression nodes
+        self.line = line # Source line number, or None
 
 class ListLiteral(Node):
+    __slots__ = ('elements',)
+    kind = NodeKind.LIST_LITERAL
+    _list_fields = ('elements',)
     def __init__(self, elements):
         self.elements = elements # List of expression nodes
 
 class MapLiteral(Node):
+    __slots__ = ('entries',)
+    kind = NodeKind.MAP_LITERAL
     def __init__(self, entries):
         self.entries = entries # List of tuples (key_expr_node, value_expr_node)
 
-class Comparison(Expression):
-    """
-    Represents a comparison expression with a left operand, operator, and right operand.
-    """
-    def __init__(self, left, op, right):
-        self.left = left
-        self.op = op
-        self.right = right
-        
-    def __str__(self):
-        return f"Comparison({self.left} {self.op} {self.right})"
+# --- Shared instances ---
+# Type nodes and the constant literals are never mutated after construction,
+# so the transformer hands out one shared instance instead of a new node per use.
+INTEGER_TYPE = Type("INTEGER")
+FLOAT_TYPE = Type("FLOAT")
+STRING_TYPE = Type("STRING")
+BOOLEAN_TYPE = Type("BOOLEAN")
+NULL_TYPE = Type("NULLTYPE")
+
+TRUE_LIT = Literal(True, "BOOLEAN")
+FALSE_LIT = Literal(False, "BOOLEAN")
+NULL_LIT = Literal(None, "NULLTYPE")
+
+_SMALL_INT_LITERALS = {i: Literal(i, "INTEGER") for i in range(-128, 256)}
+
+def integer_literal(value):
+    """Return an INTEGER Literal, reusing the shared node for small values."""
+    literal = _SMALL_INT_LITERALS.get(value)
+    return literal if literal is not None else Literal(value, "INTEGER")
+
+def name_of(name):
+    """Return the plain name held by an Identifier, token or string."""
+    return name.name if type(name) is Identifier else str(name)
+
+# Node classes indexed by NodeKind, for building kind-indexed dispatch tables
+NODE_CLASSES = (
+    Node, Program, VariableDeclaration, Assignment, PrintStatement,
+    FunctionCallStatement, IfStatement, WhileStatement, ForeachStatement,
+    FunctionDefinition, Parameter, ReturnStatement, BreakStatement, Type,
+    ListType, MapType, Literal, Identifier, BinaryOp, UnaryOp, FunctionCall,
+    ListLiteral, MapLiteral,
+)
@@ -1,96 +1,70 @@
-from lark import Transformer, v_args
-from lark.lexer import Token
+import codecs
+import operator
+import re
+from lark import Transformer_NonRecursive, v_args
+from lark.exceptions import LarkError
 import ast_nodes as ast
 
-# Helper to extract value from Token if needed
-def get_val(item):
-    return item.value if isinstance(item, Token) else item
-
+class TransformError(LarkError):
+    """Raised when a token is valid syntax but has no AST meaning (e.g. a bad escape)."""
+    pass
+
+# One escape sequence in a string literal, decoded the way a Python string
+# literal would be. Only the escapes themselves go through unicode_escape, so
+# the text around them (including non-Latin-1 characters) is never re-encoded.
+# A backslash at the very end matches with an empty tail and is reported.
+_ESCAPE_SEQUENCE = re.compile(r'\\(x..|u....|U........|N\{[^}]*\}|[0-7]{1,3}|.|$)', re.DOTALL)
+
+def _decode_escape(match):
+    seq = match.group(0)
+    if len(seq) == 2 and not seq.isascii():
+        # Not an escape (e.g. a backslash before a CJK character): kept as-is
+        return seq
+    return codecs.decode(seq, 'unicode_escape')
+
+# Names reach the rule callbacks as Identifier nodes (see IDENTIFIER below)
+# and operators as raw Tokens, so each callback knows statically what it gets
+# and reads .value / passes nodes through without a runtime type check.
+
+# Transformer_NonRecursive walks a standalone parse tree with an explicit
+# stack, so deep expressions never hit the recursion limit. When embedded in
+# the LALR parser only the rule callbacks are used.
 @v_args(inline=True) # Makes rule methods receive children directly as args
-class ASTTransformer(Transformer):
-    def start(self, *statements):
+class ASTTransformer(Transformer_NonRecursive):
+    @v_args(inline=False)
+    def start(self, statements):
         # Filter out None results from ignored_statement
         return ast.Program([stmt for stmt in statements if stmt is not None])
 
     # --- Statements ---
+    # Statements take their line from their first token: the name for
+    # statements that start with one, otherwise the kept keyword token.
+    # The embedded transformer gets no Lark meta, so tokens are the only
+    # source of positions.
     def variable_declaration(self, name, var_type, initializer=None):
-        return ast.VariableDeclaration(get_val(name), var_type, initializer)
+        return ast.VariableDeclaration(name, var_type, initializer, name.line)
 
     def assignment(self, target, value):
-        # Handle target correctly whether it's an identifier token or a more complex expression
-        if hasattr(target, 'name'):
-            # It's already an identifier object
-            target_obj = target
-        elif isinstance(target, str):
-            # Convert string to identifier
-            target_obj = ast.Identifier(get_val(target))
-        else:
-            # Use as is
-            target_obj = target
-            
-        # Make sure value is also properly processed
-        if isinstance(value, tuple) and len(value) >= 3:
-            # Could be an arithmetic expression like (left, op, right)
-            left, op, right = value[0], value[1], value[2]
-            if op in ['+', '-', '*', '/']:
-                # Create a BinaryOp node
-                if op == '+':
-                    value = ast.BinaryOp(left, "ADD", right)
-                elif op == '-':
-                    value = ast.BinaryOp(left, "SUB", right)
-                elif op == '*':
-                    value = ast.BinaryOp(left, "MUL", right)
-                elif op == '/':
-                    value = ast.BinaryOp(left, "DIV", right)
-            
-        return ast.Assignment(target_obj, value)
+        # target is already an Identifier and value an expression node
+        return ast.Assignment(target, value, target.line)
 
-    def print_statement(self, expression):
-        return ast.PrintStatement(expression)
+    def print_statement(self, keyword, expression):
+        return ast.PrintStatement(expression, keyword.line)
 
     def function_call_statement(self, function_call):
-        return ast.FunctionCallStatement(function_call)
-
-    def if_statement(self, *args):
-        # Parse out the condition and the blocks based on what comes after
-        condition = args[0]
-        # Extract then_block and else_block based on what we find
-        if len(args) >= 2:
-            # Find where the ELSE token/node would be, if present
-            else_index = -1
-            for i, arg in enumerate(args[1:], 1):
-                if isinstance(arg, Token) and get_val(arg) == "ELSE":
-                    else_index = i
-                    break
-                    
-            if else_index != -1:
-                # There is an else block
-                then_block = args[1:else_index]
-                else_block = args[else_index+1:]
-            else:
-                # No else block
-                then_block = args[1:]
-                else_block = None
-        else:
-            then_block = []
-            else_block = None
-            
-        # Convert to lists if they're single items or tuples
-        then_stmts = list(then_block) if isinstance(then_block, tuple) else [then_block] if then_block else []
-        else_stmts = list(else_block) if isinstance(else_block, tuple) else [else_block] if else_block else []
-        
-        return ast.IfStatement(condition, then_stmts, else_stmts)
-
-    def while_statement(self, *args):
-        # Extract the condition and body from the args
-        condition = args[0]
-        if len(args) > 1:
-            body = args[1:]
-        else:
-            body = []
-            
-        body_stmts = list(body) if isinstance(body, tuple) else [body] if body else []
-        return ast.WhileStatement(condition, body_stmts)
+        return ast.FunctionCallStatement(function_call, function_call.line)
+
+    @v_args(inline=False)
+    def block(self, statements):
+        # Filter out None results from ignored_statement
+        return [stmt for stmt in statements if stmt is not None]
+
+    # Bodies arrive as ready-made lists from the block rule
+    def if_statement(self, keyword, condition, then_block, else_block=None):
+        return ast.IfStatement(condition, then_block, else_block or [], keyword.line)
+
+    def while_statement(self, keyword, condition, body):
+        return ast.WhileStatement(condition, body, keyword.line)
 
     def foreach_statement(self, *args):
         # Extract components from the new format
@@ -100,86 +74,32 @@ class ASTTransformer(Transformer):
         item = args[0]  # IDENTIFIER token for the iterator
         collection = args[1]  # Expression to iterate over
         
-        # Process body statements
-        body_stmts = []
-        if len(args) > 2:
-            for stmt in args[2:]:
-                # Special handling for assignments in foreach body
-                if isinstance(stmt, ast.Assignment) and hasattr(stmt, 'value'):
-                    if isinstance(stmt.value, tuple) and len(stmt.value) >= 3:
-                        # This is likely an arithmetic expression (left op right)
-                        left, op, right = stmt.value[0], stmt.value[1], stmt.value[2]
-                        # Create a BinaryOp node
-                        binary_op = None
-                        op_str = str(op).strip() if hasattr(op, '__str__') else ""
-                        
-                        if op_str == '+' or (hasattr(op, 'value') and op.value == '+'):
-                            binary_op = ast.BinaryOp(left, "ADD", right)
-                        elif op_str == '-' or (hasattr(op, 'value') and op.value == '-'):
-                            binary_op = ast.BinaryOp(left, "SUB", right)
-                        elif op_str == '*' or (hasattr(op, 'value') and op.value == '*'):
-                            binary_op = ast.BinaryOp(left, "MUL", right)
-                        elif op_str == '/' or (hasattr(op, 'value') and op.value == '/'):
-                            binary_op = ast.BinaryOp(left, "DIV", right)
-                            
-                        if binary_op:
-                            # Replace the tuple with a proper BinaryOp node
-                            stmt.value = binary_op
-                body_stmts.append(stmt)
+        body_stmts = [stmt for stmt in args[2:] if stmt is not None]
         
         # Create a ForeachStatement with appropriate field names
         return ast.ForeachStatement(item, collection, body_stmts)
 
-    def function_definition(self, name, params=None, return_type=None, *body):
-        """Process function definition with name, parameters, return type and body statements"""
-        # Handle the name - convert from Token if needed
-        name = get_val(name)
-        
-        # Ensure parameters is a list
-        if params is None:
-            params = []
-        elif isinstance(params, list) and len(params) == 1 and isinstance(params[0], list):
-            # Handle nested list case from parameter_list
-            params = params[0]
-            
-        # Handle return type
-        if return_type is None:
-            # Default to NULLTYPE if no return type specified
-            return_type = ast.Type("NULLTYPE")
-        elif return_type == "NOTHING":
-            # Convert NOTHING to Python's None
-            return_type = ast.Type("NULLTYPE")
-            
-        # Clean up the body statements (filter out None values)
-        body_statements = [stmt for stmt in body if stmt is not None]
-            
-        # Create and return the FunctionDefinition node
-        return ast.FunctionDefinition(name, params, return_type, body_statements)
+    def function_definition(self, name, params, return_type, body):
+        """Process function definition; every part has a fixed grammar slot"""
+        return ast.FunctionDefinition(name, params, return_type, body, name.line)
 
-    def parameter_list(self, *params):
-        """Process a parameter list containing multiple parameters"""
-        return list(params)
+    def return_type(self, type_node=ast.NULL_TYPE):
+        # A missing return type (like NOTHING) means NULLTYPE
+        return type_node
 
-    def parameters(self, *params):
+    # Collection rules take Lark's children list as-is (inline=False)
+    # instead of unpacking it into *args and copying it back into a list
+    @v_args(inline=False)
+    def parameters(self, params):
          # This rule collects multiple parameters separated by commas
-        return list(params)
-
-    def parameter(self, *args):
-        """Process parameter declarations in both old and new styles"""
-        if len(args) == 2:
-            # New style: name: type
-            name, param_type = args
-            return ast.Parameter(get_val(name), param_type)
-        elif len(args) == 3:
-            # Old style: PARAM name AS type
-            _, name, param_type = args
-            return ast.Parameter(get_val(name), param_type)
-        else:
-            # Handle unexpected format
-            raise ValueError(f"Unexpected parameter format: {args}")
+        return params
+
+    def parameter(self, name, param_type):
+        """Process a `name: type` parameter declaration"""
+        return ast.Parameter(name, param_type)
             
-    def return_statement(self, expression=None):
-        return ast.ReturnStatement(expression)
+    def return_statement(self, keyword, expression=None):
+        return ast.ReturnStatement(expression, keyword.line)
 
     def break_statement(self):
         return ast.BreakStatement()
@@ -188,18 +108,12 @@ class ASTTransformer(Transformer):
         return None # Don't include comments in the AST
 
     # --- Types ---
-    def basetype(self, type_name=None):
-        """Process basic types including 'NOTHING' type"""
-        if type_name is None:
-            # Handle the case when basetype is called without arguments
-            # This might happen if the rule is matched but no token is provided
-            return ast.Type("NULLTYPE")
-            
-        type_str = get_val(type_name)
-        if type_str == "NOTHING":
-            # Map NOTHING to NULLTYPE for compatibility
-            type_str = "NULLTYPE"
-        return ast.Type(type_str)
+    # Base types are shared flyweights; NOTHING maps to NULLTYPE for compatibility
+    def basetype_integer(self): return ast.INTEGER_TYPE
+    def basetype_float(self): return ast.FLOAT_TYPE
+    def basetype_string(self): return ast.STRING_TYPE
+    def basetype_boolean(self): return ast.BOOLEAN_TYPE
+    def basetype_nothing(self): return ast.NULL_TYPE
 
     def list_type(self, element_type):
         return ast.ListType(element_type)
@@ -208,148 +122,91 @@ class ASTTransformer(Transformer):
         return ast.MapType(key_type, value_type)
 
     # --- Expressions ---
-    def logical_or(self, left, op=None, right=None): 
-        if op is None or right is None:
-            return left
+    # Expression rules are ?-inlined in the grammar, so these only run when
+    # there really is an operator and both operands
+    def logical_or(self, left, op, right):
         return ast.BinaryOp(left, "OR", right)
     
-    def logical_and(self, left, op=None, right=None): 
-        if op is None or right is None:
-            return left
+    def logical_and(self, left, op, right):
         return ast.BinaryOp(left, "AND", right)
     
-    def eq(self, *args):
-        return "=="
-        
-    def neq(self, *args):
-        return "!="
-        
-    def lt(self, *args):
-        return "<"
-        
-    def gt(self, *args):
-        return ">"
-        
-    def lte(self, *args):
-        return "<="
-        
-    def gte(self, *args):
-        return ">="
-        
+    # Comparison token -> canonical operator string, so every BinaryOp shares
+    # one string object per operator instead of holding its token's copy
+    _COMPARE_OP = {op: op for op in ('==', '!=', '<', '<=', '>', '>=')}
+
     def comparison(self, left, op, right):
-        """Process comparison expressions with the correct operators"""
-        # Map the comparison operator token to the actual operator
-        op_str = op
-        return ast.Comparison(left, op_str, right)
-
-    def arith_expr(self, left, op=None, right=None): 
-        # Process arithmetic expression
-        if op is None or right is None:
-            return left
-            
-        # Get the operator value safely
-        if hasattr(op, 'value'):
-            op_val = get_val(op)
-        else:
-            op_val = str(op).strip()
-            
-        # Create the appropriate binary operation based on operator
-        if op_val == '+':
-            return ast.BinaryOp(left, "ADD", right)
-        elif op_val == '-':
-            return ast.BinaryOp(left, "SUB", right)
-        elif op_val == '*':
-            return ast.BinaryOp(left, "MUL", right)
-        elif op_val == '/':
-            return ast.BinaryOp(left, "DIV", right)
-        else:
-            return ast.BinaryOp(left, op_val, right)
-
-    def term(self, left, op=None, right=None): 
-        if op is None or right is None:
-            return left
-        return ast.BinaryOp(left, get_val(op), right)
-    
-    def factor(self, *args):
-        # Handle unary operations like negation
-        if len(args) == 1:  # It's just an atom
-            return args[0]
-        else:  # It's unary_op factor
-            op, operand = args
-            op_str = str(op).strip()
-            
-            # Check for negation with an integer literal
-            if op_str == "-" and isinstance(operand, ast.Literal) and operand.type == "INTEGER":
-                # Create a new integer literal with negative value
-                value = -int(operand.value)
-                return ast.Literal(value, "INTEGER")
-            elif op_str == "-":
-                return ast.UnaryOp("NEG", operand)
-            elif op_str == "NOT" or op_str == "!":
-                return ast.UnaryOp("NOT", operand)
-            else:
-                return ast.UnaryOp(get_val(op), operand)
+        # Comparisons are plain BinaryOps keyed by the operator text
+        op_val = op.value
+        return ast.BinaryOp(left, self._COMPARE_OP.get(op_val, op_val), right)
+
+    # Binary arithmetic operator token -> BinaryOp operator name
+    _ARITH_OP = {'+': "ADD", '-': "SUB", '*': "MUL", '/': "DIV"}
+    # Integer operations folded at parse time. DIV is left alone since it
+    # produces a float at runtime.
+    _FOLD_INT_OP = {"ADD": operator.add, "SUB": operator.sub, "MUL": operator.mul}
+
+    def arith_expr(self, left, op, right):
+        # Process arithmetic expression (also used for term)
+        op_val = op.value
+        op_name = self._ARITH_OP.get(op_val, op_val)
+        # Fold constant integer operands while reducing, so literal chains
+        # collapse bottom-up without a separate pass over the AST
+        fold = self._FOLD_INT_OP.get(op_name)
+        if (fold is not None and type(left) is ast.Literal and type(right) is ast.Literal
+                and left.type == "INTEGER" and right.type == "INTEGER"):
+            return ast.integer_literal(fold(left.value, right.value))
+        return ast.BinaryOp(left, op_name, right)
+
+    term = arith_expr
     
-    def unary_op(self, op=None):
-        if op is None:
-            return None
-        return op
-
-    def function_call(self, name, arguments=None):
-        """Process function call with arguments"""
-        # Handle function name - could be a token or a string
-        if hasattr(name, 'value'):
-            func_name = name.value
-        else:
-            func_name = str(name)
-            
-        # Process arguments
-        args = []
-        if arguments is not None:
-            if isinstance(arguments, list):
-                args = arguments
-            else:
-                args = [arguments]
-                
-        return ast.FunctionCall(func_name, args)
+    def neg(self, operand):
+        """Process unary minus, folding it into integer literals"""
+        if type(operand) is ast.Literal and operand.type == "INTEGER":
+            return ast.integer_literal(-operand.value)
+        return ast.UnaryOp("-", operand)
+
+    def pos(self, operand):
+        """Unary plus is a no-op"""
+        return operand
+
+    def function_call(self, name, arguments):
+        """Process function call; the grammar always supplies an argument list"""
+        return ast.FunctionCall(name.name, arguments, name.line)
         
-    def add(self, left, right):
-        """Process addition operation"""
-        return ast.BinaryOp(left, "ADD", right)
-        
-    def sub(self, left, right):
-        """Process subtraction operation"""
-        return ast.BinaryOp(left, "SUB", right)
-        
-    def mul(self, left, right):
-        """Process multiplication operation"""
-        return ast.BinaryOp(left, "MUL", right)
-        
-    def div(self, left, right):
-        """Process division operation"""
-        return ast.BinaryOp(left, "DIV", right)
-
-    def arguments(self, *args):
+    @v_args(inline=False)
+    def arguments(self, args):
         # Collects multiple arguments
-        return list(args)
+        return args
 
-    def list_literal(self, *elements):
-        return ast.ListLiteral(list(elements))
+    @v_args(inline=False)
+    def list_literal(self, elements):
+        return ast.ListLiteral(elements)
 
-    def map_literal(self, *entries):
+    @v_args(inline=False)
+    def map_literal(self, entries):
         # entries will be tuples from map_entry
-        return ast.MapLiteral(list(entries))
+        return ast.MapLiteral(entries)
 
     def map_entry(self, key, value):
         return (key, value) # Return tuple for map_literal
 
     # --- Atoms ---
-    def NUMBER(self, n): return ast.Literal(int(get_val(n)), "INTEGER")
-    def FLOAT_NUMBER(self, n): return ast.Literal(float(get_val(n)), "FLOAT")
-    def STRING_LITERAL(self, s): return ast.Literal(eval(get_val(s)), "STRING") # Use eval to handle escapes
+    # Tokens are str subclasses, so int()/float() can take them directly
+    def NUMBER(self, n): return ast.integer_literal(int(n))
+    def FLOAT_NUMBER(self, n): return ast.Literal(float(n), "FLOAT")
+    def STRING_LITERAL(self, s):
+        # Strip the quotes; only strings containing escapes need decoding
+        inner = s[1:-1]
+        if '\\' not in inner:
+            return ast.Literal(inner, "STRING")
+        try:
+            decoded = _ESCAPE_SEQUENCE.sub(_decode_escape, inner)
+        except UnicodeDecodeError as e:
+            raise TransformError(f"Invalid escape in string literal {s} at line {s.line}, "
+                                 f"column {s.column}: {e.reason}") from None
+        return ast.Literal(decoded, "STRING")
     def BOOLEAN_LITERAL(self, b):
-        # Convert to Python boolean literal
-        value = str(b).upper() == 'TRUE'
-        return ast.Literal(value, "BOOLEAN")
-    def NULL_LITERAL(self, _): return ast.Literal(None, "NULLTYPE")
-    def IDENTIFIER(self, i): return ast.Identifier(get_val(i))
+        # The terminal only matches TRUE/FALSE, so compare the token as-is
+        return ast.TRUE_LIT if b == "TRUE" else ast.FALSE_LIT
+    def NULL_LITERAL(self, _): return ast.NULL_LIT
+    def IDENTIFIER(self, i): return ast.Identifier(i.value, i.line)
@@ -3,63 +3,91 @@
 # A simplified version of main.py with additional debug output
 
 import sys
-from lark import Lark
 from lark.exceptions import LarkError
+import ast_nodes as ast
 from ast_transformer import ASTTransformer
+from fluent_cache import get_parser
 from transpiler import Transpiler, TranspilerError
 
-def debug_ast_node(node, indent=0):
-    """Recursively debug an AST node and its children"""
-    node_type = type(node).__name__
-    indent_str = "  " * indent
-    
-    if isinstance(node, list):
-        print(f"{indent_str}List with {len(node)} items:")
-        for i, item in enumerate(node):
-            print(f"{indent_str}  Item {i}:")
-            debug_ast_node(item, indent + 2)
-        return
+def debug_ast_node(root, indent=0):
+    """Print an AST node and its children, walking with an explicit stack"""
+    # Stack entries are either already-formatted text or (node, indent) pairs
+    # still to be expanded; entries are pushed in reverse so they pop in order.
+    # The whole dump is buffered and written to stdout in one call.
+    stack = [(root, indent)]
+    out = []
+    write = out.append
+    while stack:
+        entry = stack.pop()
+        if type(entry) is str:
+            write(entry)
+            continue
+        node, indent = entry
+        indent_str = "  " * indent
         
-    print(f"{indent_str}Node: {node_type}")
-    
-    # Print attributes
-    for attr_name in dir(node):
-        if attr_name.startswith('_') or callable(getattr(node, attr_name)):
+        if isinstance(node, list):
+            pending = [f"{indent_str}List with {len(node)} items:\n"]
+            for i, item in enumerate(node):
+                pending.append(f"{indent_str}  Item {i}:\n")
+                pending.append((item, indent + 2))
+            stack.extend(reversed(_join_text(pending)))
             continue
-            
-        attr_value = getattr(node, attr_name)
-        print(f"{indent_str}  {attr_name}: {repr(attr_value)}")
         
-        # Recursively debug child nodes or lists
-        if isinstance(attr_value, list) and attr_value and hasattr(attr_value[0], '__dict__'):
-            print(f"{indent_str}  {attr_name} contains:")
-            for child in attr_value:
-                debug_ast_node(child, indent + 2)
-        elif hasattr(attr_value, '__dict__'):
-            print(f"{indent_str}  {attr_name} is a node:")
-            debug_ast_node(attr_value, indent + 2)
+        text = [f"{indent_str}Node: {type(node).__name__}\n"]
+        if not isinstance(node, ast.Node):
+            write(text[0])
+            continue
+        
+        # Walk the fields each node class declares instead of probing dir()
+        for attr_name in node._scalar_fields:
+            text.append(f"{indent_str}  {attr_name}: {repr(getattr(node, attr_name))}\n")
+        pending = ["".join(text)]
+        
+        for attr_name in node._node_fields:
+            attr_value = getattr(node, attr_name)
+            pending.append(f"{indent_str}  {attr_name}: {repr(attr_value)}\n")
+            if isinstance(attr_value, ast.Node):
+                pending.append(f"{indent_str}  {attr_name} is a node:\n")
+                pending.append((attr_value, indent + 2))
+                
+        for attr_name in node._list_fields:
+            attr_value = getattr(node, attr_name)
+            pending.append(f"{indent_str}  {attr_name}: {repr(attr_value)}\n")
+            if attr_value:
+                pending.append(f"{indent_str}  {attr_name} contains:\n")
+                pending.extend((child, indent + 2) for child in attr_value)
+        stack.extend(reversed(_join_text(pending)))
+    sys.stdout.write("".join(out))
 
-def debug_transpile(ast_node):
-    """A safe wrapper around the transpile method with debug info"""
-    transpiler = Transpiler()
-    
-    # Override the visit_FunctionCall method with a debug version
-    original_visit_function_call = transpiler.visit_FunctionCall
-    
-    def debug_visit_function_call(node):
+def _join_text(entries):
+    """Merge runs of adjacent text entries into one stack entry"""
+    merged = []
+    for entry in entries:
+        if type(entry) is str and merged and type(merged[-1]) is str:
+            merged[-1] += entry
+        else:
+            merged.append(entry)
+    return merged
+
+class DebugTranspiler(Transpiler):
+    """Transpiler that reports how each function call's arguments are visited"""
+    def visit_FunctionCall(self, node):
         print(f"\nDEBUG: FunctionCall for {getattr(node.name, 'name', node.name)}")
         print(f"  Arguments: {node.arguments}")
         
         args = []
         for i, arg in enumerate(node.arguments):
-            arg_val = transpiler.visit(arg)
+            arg_val = self.visit(arg)
             print(f"  Arg {i}: {arg} -> {repr(arg_val)} (type: {type(arg_val)})")
             args.append(arg_val)
             
         print(f"  All args: {args} (type: {type(args)})")
-        return original_visit_function_call(node)
-        
-    transpiler.visit_FunctionCall = debug_visit_function_call
+        # Reuse the visited arguments rather than visiting them again
+        return self._format_call(node, args)
+
+def debug_transpile(ast_node):
+    """A safe wrapper around the transpile method with debug info"""
+    transpiler = DebugTranspiler()
     
     try:
         return transpiler.transpile(ast_node)
@@ -74,9 +102,8 @@ def main(filepath):
     """Loads, parses, and transpiles a .is file with debug info."""
 
     try:
-        # Load the grammar
-        with open("fluent_grammar.lark", "r") as f:
-            fluent_parser = Lark(f.read(), start='start', parser='lalr')
+        # Tree-building parser, so the raw parse tree can be printed
+        fluent_parser = get_parser(embed_transformer=False)
 
         # Load the Fluent source code
         with open(filepath, "r") as f:
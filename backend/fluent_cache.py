@@ -0,0 +1,178 @@
+# File: fluent_cache.py
+# On-disk caches that let unchanged Fluent sources skip parsing, transformation
+# and code generation, and let every run skip rebuilding the LALR tables.
+
+import hashlib
+import importlib.util
+import marshal
+import os
+import pickle
+import sqlite3
+from lark import Lark, __version__ as lark_version
+from ast_transformer import ASTTransformer
+from py_codegen import compile_program
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+GRAMMAR_FILE = os.path.join(BACKEND_DIR, "fluent_grammar.lark")
+CACHE_DIR = os.path.join(BACKEND_DIR, ".fluent_cache")
+AST_CACHE_DB = os.path.join(CACHE_DIR, "ast_cache.sqlite3")
+PARSER_CACHE = os.path.join(CACHE_DIR, "lalr_parser.cache")
+
+# Files that decide what AST a given source produces. Editing any of them,
+# or switching Lark versions, changes every cache key, so stale trees are
+# never loaded.
+_COMPILER_FILES = ("fluent_grammar.lark", "ast_nodes.py", "ast_transformer.py")
+_compiler_digest = None
+
+def _get_compiler_digest():
+    """Hash the compiler files once per process."""
+    global _compiler_digest
+    if _compiler_digest is None:
+        h = hashlib.sha256(lark_version.encode('ascii'))
+        for name in _COMPILER_FILES:
+            with open(os.path.join(BACKEND_DIR, name), 'rb') as f:
+                h.update(f.read())
+        _compiler_digest = h.digest()
+    return _compiler_digest
+
+def source_key(source):
+    """Return the SHA-256 cache key for Fluent source bytes."""
+    return hashlib.sha256(_get_compiler_digest() + source).digest()
+
+_codegen_digest = None
+
+def _get_codegen_digest():
+    """Hash the code generator and the bytecode format once per process."""
+    global _codegen_digest
+    if _codegen_digest is None:
+        # marshal output is only readable by the same bytecode version
+        h = hashlib.sha256(importlib.util.MAGIC_NUMBER)
+        with open(os.path.join(BACKEND_DIR, "py_codegen.py"), 'rb') as f:
+            h.update(f.read())
+        _codegen_digest = h.digest()
+    return _codegen_digest
+
+def code_key(source, filename):
+    """Return the cache key for the code object compiled from source."""
+    # The filename is baked into the code object for tracebacks
+    return hashlib.sha256(source_key(source) + _get_codegen_digest()
+                          + filename.encode('utf-8')).digest()
+
+# One parser per process for each mode (AST-building or raw parse tree)
+_parsers = {}
+
+def get_parser(embed_transformer=True):
+    """
+    Return the shared Fluent parser, building it on first use.
+    Lark saves the compiled LALR tables to PARSER_CACHE keyed by an MD5 of the
+    grammar text, so only the first run after a grammar edit compiles them.
+    With embed_transformer the parser returns the AST, otherwise the parse tree.
+    If the cache directory can't be written, the parser is built uncached.
+    """
+    parser = _parsers.get(embed_transformer)
+    if parser is None:
+        with open(GRAMMAR_FILE, 'r') as f:
+            grammar = f.read()
+        # maybe_placeholders=False leaves an absent [...] optional out of the
+        # children instead of passing None (lark 1.x's default), so empty
+        # argument and parameter lists arrive as []
+        options = dict(start='start', parser='lalr', lexer='contextual',
+                       transformer=ASTTransformer() if embed_transformer else None,
+                       maybe_placeholders=False)
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            parser = Lark(grammar, cache=PARSER_CACHE, **options)
+        except OSError:
+            parser = Lark(grammar, **options)
+        _parsers[embed_transformer] = parser
+    return parser
+
+# The cache database connection, opened once per process and tagged with
+# the pid that opened it: a --batch worker forked from a process that had
+# it open must not share the parent's sqlite connection
+_connection = None
+_connection_pid = None
+
+def _connect():
+    """Return this process's cache database connection, creating the schema on first use."""
+    global _connection, _connection_pid
+    if _connection is None or _connection_pid != os.getpid():
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Wait briefly for other writers (--batch workers), but a database held
+        # locked by something else should not stall the compile for long
+        conn = sqlite3.connect(AST_CACHE_DB, timeout=1)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS ast_cache (hash BLOB PRIMARY KEY, pickle BLOB)")
+            conn.execute("CREATE TABLE IF NOT EXISTS code_cache (hash BLOB PRIMARY KEY, code BLOB)")
+        except sqlite3.Error:
+            conn.close()
+            raise
+        _connection, _connection_pid = conn, os.getpid()
+    return _connection
+
+# The caches are only an optimisation: a read-only backend directory or a
+# locked or corrupt database turns lookups into misses and skips the stores,
+# rather than failing the compile. A connection that failed to open is tried
+# again on the next lookup.
+
+def _cache_get(table, column, key):
+    """Return the blob cached under key, or None on a miss or cache error."""
+    try:
+        row = _connect().execute(f"SELECT {column} FROM {table} WHERE hash = ?", (key,)).fetchone()
+    except (sqlite3.Error, OSError):
+        return None
+    return row[0] if row is not None else None
+
+def _cache_put(table, column, key, data):
+    """Store a blob under key, ignoring cache errors."""
+    try:
+        conn = _connect()
+        with conn:
+            # Committed right away so other processes see the entry
+            conn.execute(f"INSERT OR REPLACE INTO {table} (hash, {column}) VALUES (?, ?)",
+                         (key, data))
+    except (sqlite3.Error, OSError):
+        pass
+
+def load_ast(filepath, parser=None):
+    """
+    Return the AST for a .is file, running the parser only on a cache miss.
+    A custom parser must have ASTTransformer embedded so parse() returns the
+    AST; by default the shared one from get_parser() is used.
+    """
+    with open(filepath, 'rb') as f:
+        source = f.read()
+    key = source_key(source)
+
+    data = _cache_get("ast_cache", "pickle", key)
+    if data is not None:
+        return pickle.loads(data)
+
+    if parser is None:
+        parser = get_parser()
+    ast_root = parser.parse(source.decode('utf-8'))
+    try:
+        data = pickle.dumps(ast_root, protocol=pickle.HIGHEST_PROTOCOL)
+    except RecursionError:
+        # pickle recurses per tree level; very deep ASTs are just not cached
+        return ast_root
+    _cache_put("ast_cache", "pickle", key, data)
+    return ast_root
+
+def load_code(filepath):
+    """
+    Return the compiled code object for a .is file. Unchanged sources are
+    served from the cache as marshalled bytecode; on a miss the AST comes
+    from load_ast() and is compiled with py_codegen.
+    """
+    with open(filepath, 'rb') as f:
+        source = f.read()
+    key = code_key(source, filepath)
+
+    data = _cache_get("code_cache", "code", key)
+    if data is not None:
+        return marshal.loads(data)
+
+    code = compile_program(load_ast(filepath), filepath)
+    _cache_put("code_cache", "code", key, marshal.dumps(code))
+    return code
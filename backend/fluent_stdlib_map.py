@@ -6,7 +6,7 @@ def _concatenate_strings(str1, str2):
     """Concatenates two strings safely, returning None if inputs are not strings."""
     try:
         return str(str1) + str(str2)
-    except:
+    except (ValueError, TypeError):
         return None
 
 def _get_element(lst, index):
@@ -29,21 +29,21 @@ def _add_element(lst, element):
     try:
         lst.append(element)
         return None
-    except:
+    except AttributeError:
         return None
 
 def _map_has_key(map_obj, key):
     """Checks if a map has the specified key."""
     try:
         return key in map_obj
-    except:
+    except TypeError:
         return False
 
 def _get_map_value(map_obj, key):
     """Gets value for key from map, returns None if key not found."""
     try:
         return map_obj.get(key, None)  # Default to None if key not found
-    except:
+    except (AttributeError, TypeError):
         return None
 
 def _set_map_value(map_obj, key, value):
@@ -51,28 +51,28 @@ def _set_map_value(map_obj, key, value):
     try:
         map_obj[key] = value
         return None
-    except:
+    except TypeError:
         return None
 
 def _get_map_keys(map_obj):
     """Returns list of keys from map."""
     try:
         return list(map_obj.keys())
-    except:
+    except AttributeError:
         return None
 
 def _string_to_integer(s):
     """Converts string to integer, returns None if conversion fails."""
     try:
         return int(s)
-    except:
+    except (ValueError, TypeError):
         return None
 
 def _string_to_float(s):
     """Converts string to float, returns None if conversion fails."""
     try:
         return float(s)
-    except:
+    except (ValueError, TypeError):
         return None
 
 def _string_to_boolean(s):
@@ -95,7 +95,7 @@ def _open_file(filepath, mode):
         if mode not in ('r', 'w'):
             return None
         return open(filepath, mode)
-    except:
+    except (OSError, ValueError, TypeError):
         return None
 
 def _read_line(filehandle):
@@ -105,7 +105,7 @@ def _read_line(filehandle):
         if not line:  # EOF
             return None
         return line.rstrip('\n')
-    except:
+    except (OSError, ValueError, AttributeError):
         return None
 
 def _write_line(filehandle, line):
@@ -113,7 +113,7 @@ def _write_line(filehandle, line):
     try:
         print(line, file=filehandle)
         return True
-    except:
+    except (OSError, ValueError, AttributeError):
         return False
 
 def _close_file(filehandle):
@@ -121,14 +121,14 @@ def _close_file(filehandle):
     try:
         filehandle.close()
         return None
-    except:
+    except (OSError, AttributeError):
         return None
 
 def _split_string(s, delimiter):
     """Splits string by delimiter, returns list of strings."""
     try:
         return s.split(delimiter)
-    except:
+    except (ValueError, TypeError, AttributeError):
         return None
 
 # List conversion functions
@@ -142,7 +142,7 @@ def _read_file(filename):
     try:
         with open(filename, 'r') as f:
             return f.read()
-    except:
+    except (OSError, ValueError, TypeError):
         return None
 
 def _write_file(filename, content):
@@ -151,7 +151,7 @@ def _write_file(filename, content):
         with open(filename, 'w') as f:
             f.write(content)
         return True
-    except:
+    except (OSError, ValueError, TypeError):
         return False
 
 def _append_file(filename, content):
@@ -160,7 +160,7 @@ def _append_file(filename, content):
         with open(filename, 'a') as f:
             f.write(content)
         return True
-    except:
+    except (OSError, ValueError, TypeError):
         return False
 
 def _file_exists(filename):
@@ -310,3 +310,16 @@ get_map_value = _get_map_value
 set_map_value = _set_map_value
 get_map_keys = _get_map_keys
 list_to_string = list_to_string
+
+# The names Fluent programs see the standard library under: every function by
+# its lowercase Fluent name, with the exports above where they differ.
+# py_codegen's run globals and the transpiled source's preamble both use it.
+STDLIB_GLOBALS = {name.lower(): func for name, func in FLUENT_TO_PYTHON_MAP.items()}
+STDLIB_GLOBALS.update(
+    get_length=get_length, get_element=get_element, set_element=_set_element,
+    get_string_length=get_string_length, split_string=split_string,
+    concatenate_strings=concatenate_strings, integer_to_string=integer_to_string,
+    list_to_string=list_to_string, map_has_key=map_has_key,
+    get_map_value=get_map_value, set_map_value=set_map_value,
+    get_map_keys=get_map_keys,
+)
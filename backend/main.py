@@ -1,93 +1,179 @@
 #!/usr/bin/env python
 # File: main.py
-# Example script to parse and transpile Fluent code.
+# Example script to parse, compile and run Fluent code.
 
+import argparse
+import marshal
+import os
+import subprocess
 import sys
-from lark import Lark
+import threading
+import traceback
+from concurrent.futures import ProcessPoolExecutor
 from lark.exceptions import LarkError
-from ast_transformer import ASTTransformer
+from fluent_cache import get_parser, load_ast, load_code
+from py_codegen import CodegenError, make_globals
 from transpiler import Transpiler, TranspilerError
 
-def main(filepath):
-    """Loads, parses, and transpiles a .is file."""
+# Seconds a program may run before it is reported as a likely infinite loop
+RUN_TIMEOUT = 5
+
+def run_in_process(code):
+    """
+    Run a compiled program in this interpreter on a daemon thread, so a
+    runaway loop can be reported after RUN_TIMEOUT without blocking exit.
+    The loop itself is not stopped; its later output is discarded.
+    """
+    def target():
+        try:
+            exec(code, make_globals())
+        except Exception:
+            print("!!! Execution Error !!!")
+            traceback.print_exc(file=sys.stdout)
+
+    worker = threading.Thread(target=target, daemon=True)
+    worker.start()
+    worker.join(RUN_TIMEOUT)
+    if worker.is_alive():
+        # A thread can't be stopped, so the program keeps running until the
+        # interpreter exits; discard what it still prints so it doesn't run
+        # into the report
+        stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+        print("\n!!! Execution Timeout !!!", file=stdout)
+        print("The program took too long to execute (possible infinite loop)", file=stdout)
+        print("Use --isolate to run it in a process that is killed on timeout", file=stdout)
+
+def run_isolated(code):
+    """Run a compiled program in a child interpreter that can be killed."""
+    # The child process runs from the backend directory so it can import
+    # the stdlib module
+    backend_dir = os.path.dirname(os.path.abspath(__file__))
+    
+    # The code object is marshalled over stdin and run by py_codegen
+    try:
+        result = subprocess.run([sys.executable, os.path.join(backend_dir, "py_codegen.py")],
+                                input=marshal.dumps(code),
+                                capture_output=True, 
+                                cwd=backend_dir,
+                                timeout=RUN_TIMEOUT)
+        
+        # Print output or errors
+        if result.returncode == 0:
+            print(result.stdout.decode())
+        else:
+            print("!!! Execution Error !!!")
+            print(result.stderr.decode())
+    except subprocess.TimeoutExpired:
+        # subprocess.run kills the child before raising
+        print("!!! Execution Timeout !!!")
+        print("The program took too long to execute (possible infinite loop)")
+
+def main(filepath, emit_python=False, verbose=False, isolate=False):
+    """Loads, parses, compiles and runs a .is file."""
     print(f"Parsing Fluent code from: {filepath}")
     print("-" * 30)
     
     try:
-        # Read input file
-        with open(filepath, 'r') as f:
-            fluent_code = f.read()
-            
-        # Parse with Lark grammar
-        with open("fluent_grammar.lark", 'r') as f:
-            grammar = f.read()
-        parser = Lark(grammar, start='start')
-        parse_tree = parser.parse(fluent_code)
-        
-        # Display parse tree for debugging
-        print("\n--- Lark Parse Tree ---")
-        print(parse_tree.pretty())
-        
-        # Transform to AST
-        print("\n--- Transforming to AST ---")
-        transformer = ASTTransformer()
-        ast_root = transformer.transform(parse_tree)
-        
-        # Transpile to Python
-        print("\n--- Transpiling to Python ---")
-        transpiler = Transpiler()
-        python_code = transpiler.transpile(ast_root)
+        # Unchanged sources are served from the on-disk caches as ready
+        # bytecode. On a miss the shared LALR parser (tables cached on disk
+        # too) applies the transformer inline while reducing, so we get the
+        # AST back without building a parse tree first (use
+        # debug_transpiler.py to inspect it), and the AST is lowered straight
+        # to a Python code object; no source text is generated or re-parsed.
+        print("\n--- Parsing and compiling to Python bytecode ---")
+        code = load_code(filepath)
         
-        # Write the generated code to a temp file
-        import os
-        output_file = os.path.join(os.path.dirname(filepath), "temp_output.py")
-        with open(output_file, 'w') as f:
-            f.write(python_code)
+        if emit_python:
+            # Readable Python source is only produced on request
+            print("\n--- Transpiling to Python ---")
+            python_code = Transpiler().transpile(load_ast(filepath))
             
-        print("\n--- Generated Python Code ---")
-        print(python_code)
+            # Write the generated code to a temp file
+            output_file = os.path.join(os.path.dirname(filepath), "temp_output.py")
+            with open(output_file, 'w') as f:
+                f.write(python_code)
+                
+            # Echoing the whole program is only useful when asked for
+            if verbose:
+                print("\n--- Generated Python Code ---")
+                print(python_code)
         
-        # Execute the Python code
+        # Execute the compiled code. Running it in-process skips starting a
+        # second interpreter; --isolate keeps the killable child process.
         print("\n--- Executing Python Code ---")
-        
-        # Setup the execution environment
-        # Add the backend directory to Python's path so it can find the stdlib module
-        backend_dir = os.path.dirname(os.path.abspath(__file__))
-        if backend_dir not in sys.path:
-            sys.path.append(backend_dir)
-        
-        # Execute in a subprocess to isolate environment
-        import subprocess
-        try:
-            # Add a 5-second timeout to prevent hanging on infinite loops
-            result = subprocess.run([sys.executable, output_file], 
-                                    capture_output=True, 
-                                    text=True, 
-                                    cwd=backend_dir,
-                                    timeout=5)  # 5 second timeout
-            
-            # Print output or errors
-            if result.returncode == 0:
-                print(result.stdout)
-            else:
-                print("!!! Execution Error !!!")
-                print(result.stderr)
-        except subprocess.TimeoutExpired:
-            print("!!! Execution Timeout !!!")
-            print("The program took too long to execute (possible infinite loop)")
-            # Optionally add code to kill the process here if needed
+        if isolate:
+            run_isolated(code)
+        else:
+            run_in_process(code)
         
     except LarkError as e:
         print(f"\nParsing error: {e}")
+    except CodegenError as e:
+        print(f"\n!!! Compile Error !!!\n{e}")
     except TranspilerError as e:
         print(f"\n!!! Transpiler Error !!!\n{e}")
     except Exception as e:
         print(f"\n!!! Unexpected Transpiling Error !!!\n{e}")
-        import traceback
         traceback.print_exc()
 
+def compile_file(filepath, emit_python=False):
+    """
+    Compile one .is file into the bytecode cache, and with emit_python also
+    write its transpiled source next to it as <name>.is.py, a name that can't
+    clash with a hand-written <name>.py. Returns an error
+    message, or None on success; exceptions are not sent back across processes
+    since Lark's carry parser state that does not pickle.
+    """
+    try:
+        load_code(filepath)
+        if emit_python:
+            python_code = Transpiler().transpile(load_ast(filepath))
+            with open(filepath + ".py", 'w') as f:
+                f.write(python_code)
+    except LarkError as e:
+        return f"Parsing error: {e}"
+    except (CodegenError, TranspilerError) as e:
+        return f"Compile error: {e}"
+    except Exception as e:
+        return f"Unexpected error: {type(e).__name__}: {e}"
+    return None
+
+def _init_worker():
+    # Load the parser (LALR tables from the on-disk cache) once per worker
+    # rather than on the first cache miss of every file
+    get_parser()
+
+def main_batch(filepaths, emit_python=False):
+    """Compile many .is files in parallel, one worker process per CPU."""
+    with ProcessPoolExecutor(initializer=_init_worker) as pool:
+        errors = list(pool.map(compile_file, filepaths, [emit_python] * len(filepaths)))
+
+    failed = 0
+    for filepath, error in zip(filepaths, errors):
+        if error is None:
+            print(f"ok      {filepath}")
+        else:
+            failed += 1
+            print(f"FAILED  {filepath}\n    {error}")
+    print(f"\n{len(filepaths) - failed} of {len(filepaths)} files compiled")
+    return failed
+
 if __name__ == "__main__":
-    if len(sys.argv) != 2:
-        print("Usage: python main.py <path_to_fluent_file.is>")
-        sys.exit(1)
-    main(sys.argv[1])
+    arg_parser = argparse.ArgumentParser(description="Parse, compile and run a Fluent program.")
+    arg_parser.add_argument("filepaths", nargs="+", metavar="filepath",
+                            help="path to the .is file (several with --batch)")
+    arg_parser.add_argument("--emit-python", action="store_true",
+                            help="also transpile to readable Python in temp_output.py "
+                                 "(<name>.is.py per file with --batch)")
+    arg_parser.add_argument("--verbose", action="store_true",
+                            help="print the transpiled Python (with --emit-python)")
+    arg_parser.add_argument("--isolate", action="store_true",
+                            help="run the program in a separate Python process")
+    arg_parser.add_argument("--batch", action="store_true",
+                            help="compile all given files in parallel without running them")
+    args = arg_parser.parse_args()
+    if args.batch:
+        sys.exit(1 if main_batch(args.filepaths, args.emit_python) else 0)
+    if len(args.filepaths) != 1:
+        arg_parser.error("running a program takes exactly one file; use --batch for several")
+    main(args.filepaths[0], args.emit_python, args.verbose, args.isolate)
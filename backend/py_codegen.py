@@ -0,0 +1,209 @@
+# File: py_codegen.py
+# Lowers a Fluent AST straight to a Python `ast` module and compiles it, so a
+# program can be exec'd without generating and re-parsing Python source text.
+
+import ast as pyast
+import marshal
+import sys
+import ast_nodes as ast
+from fluent_stdlib_map import STDLIB_GLOBALS
+
+_BIN_OPS = {"ADD": pyast.Add, "SUB": pyast.Sub, "MUL": pyast.Mult, "DIV": pyast.Div}
+_BOOL_OPS = {"AND": pyast.And, "OR": pyast.Or}
+_COMPARE_OPS = {
+    "==": pyast.Eq, "!=": pyast.NotEq,
+    "<": pyast.Lt, "<=": pyast.LtE,
+    ">": pyast.Gt, ">=": pyast.GtE,
+}
+_UNARY_OPS = {"-": pyast.USub, "+": pyast.UAdd, "NOT": pyast.Not}
+
+class CodegenError(Exception):
+    """Raised when an AST node has no Python equivalent."""
+    pass
+
+def _load(name):
+    return pyast.Name(id=name, ctx=pyast.Load())
+
+def _store(name):
+    return pyast.Name(id=name, ctx=pyast.Store())
+
+# Python 3.8 wraps subscript expressions in ast.Index; 3.9 takes them bare
+if sys.version_info < (3, 9):
+    def _index(expr):
+        return pyast.Index(value=expr)
+else:
+    def _index(expr):
+        return expr
+
+class PyCodegen:
+    def __init__(self):
+        # Lowering method per NodeKind, same scheme as Transpiler
+        self._dispatch = [getattr(self, cls._visit_name, self.generic_visit)
+                          for cls in ast.NODE_CLASSES]
+
+    def visit(self, node):
+        if node is None:
+            return pyast.Constant(value=None)
+        return self._dispatch[getattr(node, 'kind', ast.NodeKind.NODE)](node)
+
+    def generic_visit(self, node):
+        raise CodegenError(f"Cannot generate Python for {type(node).__name__}: {node!r}")
+
+    def _statement(self, stmt):
+        """Lower a statement, placing it on its Fluent source line."""
+        result = self.visit(stmt)
+        # Expressions inside inherit the position through
+        # fix_missing_locations, so tracebacks point at the right line of the
+        # .is file. Columns are not tracked; -1 marks them unknown so no
+        # misplaced carets are printed under the line.
+        if stmt.line is not None:
+            result.lineno = result.end_lineno = stmt.line
+            result.col_offset = result.end_col_offset = -1
+        return result
+
+    def _block(self, statements):
+        """Lower a statement list; Python needs at least one statement per block."""
+        body = [self._statement(stmt) for stmt in statements or () if stmt is not None]
+        return body or [pyast.Pass()]
+
+    # --- Statements ---
+    def visit_Program(self, node):
+        body = [self._statement(stmt) for stmt in node.statements]
+        return pyast.Module(body=body, type_ignores=[])
+
+    def visit_VariableDeclaration(self, node):
+        # Type annotations carry no runtime meaning, so only the binding is emitted
+        return pyast.Assign(targets=[_store(ast.name_of(node.name))],
+                            value=self.visit(node.initializer))
+
+    def visit_Assignment(self, node):
+        return pyast.Assign(targets=[_store(ast.name_of(node.target))],
+                            value=self.visit(node.value))
+
+    def visit_PrintStatement(self, node):
+        return pyast.Expr(value=pyast.Call(func=_load("print"),
+                                           args=[self.visit(node.expression)],
+                                           keywords=[]))
+
+    def visit_FunctionCallStatement(self, node):
+        return pyast.Expr(value=self.visit(node.function_call))
+
+    def visit_IfStatement(self, node):
+        orelse = self._block(node.else_block) if node.else_block else []
+        return pyast.If(test=self.visit(node.condition),
+                        body=self._block(node.then_block),
+                        orelse=orelse)
+
+    def visit_WhileStatement(self, node):
+        return pyast.While(test=self.visit(node.condition),
+                           body=self._block(node.body),
+                           orelse=[])
+
+    def visit_ForeachStatement(self, node):
+        return pyast.For(target=_store(ast.name_of(node.item)),
+                         iter=self.visit(node.collection),
+                         body=self._block(node.body),
+                         orelse=[])
+
+    def visit_FunctionDefinition(self, node):
+        params = [pyast.arg(arg=ast.name_of(param.name)) for param in node.params or ()]
+        args = pyast.arguments(posonlyargs=[], args=params, kwonlyargs=[],
+                               kw_defaults=[], defaults=[])
+        return pyast.FunctionDef(name=ast.name_of(node.name), args=args,
+                                 body=self._block(node.body), decorator_list=[])
+
+    def visit_ReturnStatement(self, node):
+        value = self.visit(node.expression) if node.expression is not None else None
+        return pyast.Return(value=value)
+
+    def visit_BreakStatement(self, node):
+        return pyast.Break()
+
+    # --- Expressions ---
+    def visit_Literal(self, node):
+        return pyast.Constant(value=node.value)
+
+    def visit_Identifier(self, node):
+        if node.name == "TRUE":
+            return pyast.Constant(value=True)
+        elif node.name == "FALSE":
+            return pyast.Constant(value=False)
+        return _load(node.name)
+
+    def visit_BinaryOp(self, node):
+        # Left-associative chains (a + b + c ...) nest on the left as deep as
+        # they are long, so walk that spine with a loop instead of recursing
+        spine = []
+        while type(node) is ast.BinaryOp:
+            spine.append(node)
+            node = node.left
+        result = self.visit(node)
+        for op_node in reversed(spine):
+            result = self._binary_op(result, op_node)
+        return result
+
+    def _binary_op(self, left, node):
+        """Lower one BinaryOp whose left operand is already lowered."""
+        right = self.visit(node.right)
+        op = _BIN_OPS.get(node.operator)
+        if op is not None:
+            return pyast.BinOp(left=left, op=op(), right=right)
+        op = _BOOL_OPS.get(node.operator)
+        if op is not None:
+            return pyast.BoolOp(op=op(), values=[left, right])
+        op = _COMPARE_OPS.get(node.operator)
+        if op is not None:
+            return pyast.Compare(left=left, ops=[op()], comparators=[right])
+        raise CodegenError(f"Unknown binary operator: {node.operator}")
+
+    def visit_UnaryOp(self, node):
+        op = _UNARY_OPS.get(node.operator)
+        if op is None:
+            raise CodegenError(f"Unknown unary operator: {node.operator}")
+        return pyast.UnaryOp(op=op(), operand=self.visit(node.operand))
+
+    def visit_FunctionCall(self, node):
+        func_name = ast.name_of(node.name)
+        args = [self.visit(arg) for arg in node.arguments or ()]
+
+        # Standard library calls are uppercase in Fluent
+        if func_name.isupper():
+            if func_name == "GET_ELEMENT" and len(args) == 2:
+                return pyast.Subscript(value=args[0], slice=_index(args[1]), ctx=pyast.Load())
+            func_name = func_name.lower()
+
+        return pyast.Call(func=_load(func_name), args=args, keywords=[])
+
+    def visit_ListLiteral(self, node):
+        return pyast.List(elts=[self.visit(elem) for elem in node.elements],
+                          ctx=pyast.Load())
+
+    def visit_MapLiteral(self, node):
+        return pyast.Dict(keys=[self.visit(key) for key, _ in node.entries],
+                          values=[self.visit(value) for _, value in node.entries])
+
+def make_globals():
+    """Globals for running compiled Fluent code: the stdlib under lowercase names."""
+    env = dict(STDLIB_GLOBALS)
+    env['__name__'] = '__main__'
+    return env
+
+def compile_program(program, filename='<fluent>'):
+    """Lower a Program node and compile it to a code object."""
+    module = PyCodegen().visit(program)
+    pyast.fix_missing_locations(module)
+    return compile(module, filename, 'exec')
+
+def run_program(program, filename='<fluent>'):
+    """Compile and execute a Program node, returning the globals it ran in."""
+    env = make_globals()
+    exec(compile_program(program, filename), env)
+    return env
+
+def run_marshalled(stream):
+    """Execute a marshalled code object read from a binary stream."""
+    exec(marshal.loads(stream.read()), make_globals())
+
+if __name__ == "__main__":
+    # main.py pipes compiled programs in here to run them in a child process
+    run_marshalled(sys.stdin.buffer)
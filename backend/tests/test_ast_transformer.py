@@ -0,0 +1,53 @@
+# File: tests/test_ast_transformer.py
+# Checks the AST built by the parser-embedded ASTTransformer.
+# Run from backend/ with: python -m unittest discover tests
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lark.exceptions import LarkError
+from fluent_cache import get_parser
+
+def parse_string(literal):
+    """Return the value of a string literal printed by a one-line program."""
+    program = get_parser().parse(f"PRINT({literal});\n")
+    return program.statements[0].expression.value
+
+class StringLiteralTest(unittest.TestCase):
+    def test_plain_string(self):
+        self.assertEqual(parse_string('"Hello, 日本"'), "Hello, 日本")
+
+    def test_escapes(self):
+        self.assertEqual(parse_string(r'"a\tb\n\x41\u00e9\N{BULLET}\101\\"'),
+                         "a\tb\nA\u00e9\N{BULLET}A\\")
+
+    def test_backslash_before_non_latin1_character(self):
+        # Not an escape: the backslash and the character are kept as written
+        self.assertEqual(parse_string(r'"C:\日本\file"'), "C:\\日本\x0cile")
+        self.assertEqual(parse_string(r'"smile \😀 \u263a"'), "smile \\😀 \u263a")
+
+    def test_invalid_escapes(self):
+        for literal in (r'"trailing \"', r'"\x4"', r'"\u12"', r'"\N{NO SUCH NAME}"'):
+            with self.subTest(literal=literal):
+                with self.assertRaises(LarkError):
+                    parse_string(literal)
+
+class EmptyListTest(unittest.TestCase):
+    # Empty [...] optionals must give empty lists whatever Lark's
+    # maybe_placeholders default is (False in 0.12, True in 1.x)
+    def test_call_without_arguments(self):
+        program = get_parser().parse("x: LIST<INTEGER> = CREATE_LIST()\n")
+        self.assertEqual(program.statements[0].initializer.arguments, [])
+
+    def test_function_without_parameters(self):
+        program = get_parser().parse('FUNCTION greet() : STRING\n  RETURN "hi"\nEND\n'
+                                     'FUNCTION noop()\nEND\n')
+        greet, noop = program.statements
+        self.assertEqual(greet.params, [])
+        self.assertEqual(noop.params, [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+# File: tests/test_transpiler.py
+# Checks that --emit-python source behaves like the compiled program.
+# Run from backend/ with: python -m unittest discover tests
+
+import contextlib
+import io
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fluent_cache import get_parser
+from py_codegen import run_program
+from transpiler import Transpiler
+
+def run_both(source):
+    """Return the output of the compiled program and of its transpiled source."""
+    program = get_parser().parse(source)
+    compiled = io.StringIO()
+    with contextlib.redirect_stdout(compiled):
+        run_program(program)
+    emitted = io.StringIO()
+    with contextlib.redirect_stdout(emitted):
+        exec(Transpiler().transpile(program), {'__name__': '__main__'})
+    return compiled.getvalue(), emitted.getvalue()
+
+class EmittedSourceTest(unittest.TestCase):
+    def test_helpers_outside_the_old_preamble(self):
+        # ADD_ELEMENT, FIND_ELEMENT and SQUARE_ROOT were only in the compiled
+        # run's globals, so the emitted source raised NameError
+        compiled, emitted = run_both(
+            "numbers: LIST<INTEGER> = CREATE_LIST()\n"
+            "ADD_ELEMENT(numbers, 4)\n"
+            "ADD_ELEMENT(numbers, 9)\n"
+            "PRINT(numbers)\n"
+            "PRINT(FIND_ELEMENT(numbers, 9))\n"
+            "PRINT(SQUARE_ROOT(GET_ELEMENT(numbers, 1)))\n")
+        self.assertEqual(compiled, "[4, 9]\n1\n3.0\n")
+        self.assertEqual(emitted, compiled)
+
+if __name__ == '__main__':
+    unittest.main()